@@ -1,33 +1,72 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+import matplotlib.style as mplstyle
 import numpy as np
 
+# Module level so spawned pool workers pick it up too
+mplstyle.use("fast")
+
 labels = ["RL Policy", "FSM/BT"]
 survival = [580, 480]
 kills = [215, 156]
 latency = [8.5, 0.2]
 
+# (values, title, ylabel, fname, invert, ylim)
+TASKS = [
+    (survival, "Survival Time (s)", "Seconds", "survival.png", False, (0, 700)),
+    (kills, "Kill Count", "Count", "kills.png", False, (0, 250)),
+    (latency, "Inference Latency (ms)\n(lower is better)", "ms", "latency.png", True, None),
+]
+
+_template = None
+
+def get_template():
+    """Return this process's (fig, ax, bars, bar_labels), built once and then
+    only mutated by save_bar since every chart shares the same layout."""
+    global _template
+    if _template is None:
+        fig, ax = plt.subplots(figsize=(4, 3))
+        # Fixed margins for the 4x3 figure instead of a tight_layout pass per plot
+        fig.subplots_adjust(left=0.16, right=0.96, top=0.8, bottom=0.13)
+        x = np.arange(len(labels))
+        width = 0.6
+        bars = ax.bar(x, [0] * len(labels), width, color=["#4a90e2", "#7b8ba3"])
+        ax.set_xticks(x, labels)
+        bar_labels = ax.bar_label(bars, padding=3, fmt="%.1f")
+        _template = (fig, ax, bars, bar_labels)
+    return _template
+
 def save_bar(values, title, ylabel, fname, invert=False, ylim=None):
-    x = np.arange(len(labels))
-    width = 0.6
-    fig, ax = plt.subplots(figsize=(4, 3))
-    bars = ax.bar(x, values, width, color=["#4a90e2", "#7b8ba3"])
-    ax.set_xticks(x, labels)
+    fig, ax, bars, bar_labels = get_template()
+    for bar, label, value in zip(bars, bar_labels, values):
+        bar.set_height(value)
+        label.xy = (bar.get_x() + bar.get_width() / 2, value)
+        label.set_text("%.1f" % value)
     ax.set_title(title)
     ax.set_ylabel(ylabel)
-    ax.bar_label(bars, padding=3, fmt="%.1f")
     if invert:
-        ax.invert_yaxis()
         if ylim:
             ax.set_ylim(ylim[1], ylim[0])
         else:
             ax.set_ylim(max(values) * 1.2, 0)
     elif ylim:
         ax.set_ylim(ylim)
-    fig.tight_layout()
-    fig.savefig(fname, dpi=200)
-    plt.close(fig)
-
-save_bar(survival, "Survival Time (s)", "Seconds", "survival.png", ylim=(0, 700))
-save_bar(kills, "Kill Count", "Count", "kills.png", ylim=(0, 250))
-save_bar(latency, "Inference Latency (ms)\n(lower is better)", "ms", "latency.png", invert=True)
-print("Đã lưu: survival.png, kills.png, latency.png")
+    else:
+        ax.set_autoscaley_on(True)
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+        if ax.yaxis_inverted():
+            ax.invert_yaxis()
+    fig.savefig(fname, dpi=200, pil_kwargs={"compress_level": 1, "optimize": False})
+
+def save_bar_one(task):
+    save_bar(*task)
+    return task[3]
+
+if __name__ == "__main__":
+    with ProcessPoolExecutor(max_workers=len(TASKS)) as ex:
+        saved = list(ex.map(save_bar_one, TASKS))
+    print(f"Đã lưu: {', '.join(saved)}")
@@ -3,82 +3,222 @@
 Generate network metrics report from test results XML files
 """
 
-import xml.etree.ElementTree as ET
+import contextlib
+import functools
+import io
+import itertools
 import json
+import mmap
 import sys
 import os
 from pathlib import Path
 
-def parse_test_results(test_dir):
-    """Parse test result XML files and extract network metrics"""
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+
+# Result files smaller than this are read in one call instead of mmapped
+MMAP_THRESHOLD = 1 << 20
+
+# Below this many result files the pool startup costs more than it saves
+POOL_MIN_FILES = 16
+POOL_MAX_WORKERS = 8
+
+# Test name fragment -> scenario key in metrics["scenarios"]
+SCENARIO_MAP = {
+    'TwoPlayers': 'twoPlayers',
+    'ThreePlayer': 'threePlayers',
+    'FourPlayer': 'fourPlayers',
+}
+
+def iter_testcases(xml_file):
+    """Stream <testcase> elements from a JUnit XML file, freeing each one after use"""
     
-    metrics = {
-        "latency": {"average": 0, "min": 0, "max": 0, "samples": 0},
-        "bandwidth": {"upstream": 0, "downstream": 0, "peak": 0},
-        "scenarios": {"twoPlayers": False, "threePlayers": False, "fourPlayers": False},
-        "tests": []
+    with open(xml_file, 'rb') as fh:
+        # Small files (and empty ones, which cannot be mapped) are cheaper
+        # to slurp with a single read() than to mmap/munmap
+        if os.fstat(fh.fileno()).st_size < MMAP_THRESHOLD:
+            yield from _iterparse_testcases(io.BytesIO(fh.read()))
+            return
+        
+        # Read through the page cache mapping rather than buffered file I/O
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _iterparse_testcases(mm)
+
+def _iterparse_testcases(source):
+    if HAVE_LXML:
+        for _, elem in ET.iterparse(source, tag='testcase', huge_tree=True):
+            yield elem
+            
+            # Drop the processed element and its already-seen siblings
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    else:
+        for _, elem in ET.iterparse(source):
+            if elem.tag == 'testcase':
+                yield elem
+                elem.clear()
+
+def iter_xml_files(test_dir):
+    """Recursively yield paths of regular .xml files under test_dir"""
+    
+    stack = [test_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.xml') and entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError as e:
+            print(f"Error reading {current}: {e}")
+
+def dump_metrics(metrics):
+    """Serialize metrics to indented JSON bytes"""
+    
+    if orjson is not None:
+        return orjson.dumps(metrics, option=orjson.OPT_INDENT_2)
+    return json.dumps(metrics, indent=2).encode('utf-8')
+
+def empty_partial():
+    """Partial metrics for a file that contributed no testcases"""
+    
+    return {
+        "tests": [],
+        "scenarios": {},
+        "samples": 0,
+        "total_time": 0.0,
+        "count": 0
     }
+
+def parse_one(xml_file, full=False):
+    """Parse a single result file into a partial metrics dict
     
-    # Find all XML files
-    xml_files = list(Path(test_dir).glob("**/*.xml"))
+    A file that fails to parse contributes nothing, even if some of its
+    testcases were streamed before the error.
+    """
     
-    if not xml_files:
-        print(f"No test results found in {test_dir}")
-        return metrics
+    tests = []
+    scenarios = {}
+    samples = 0
+    total_time = 0.0
+    count = 0
     
-    for xml_file in xml_files:
-        try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
+    try:
+        # Extract test cases
+        for testcase in iter_testcases(xml_file):
+            test_name = testcase.get('name', '')
+            classname = testcase.get('classname', '')
+            time = float(testcase.get('time', 0))
+            total_time += time
+            count += 1
             
-            # Extract test cases
-            for testcase in root.findall('.//testcase'):
-                test_name = testcase.get('name', '')
-                classname = testcase.get('classname', '')
-                time = float(testcase.get('time', 0))
+            # Extract metrics from test output
+            system_out = testcase.find('system-out')
+            if system_out is not None and system_out.text:
+                output = system_out.text
                 
-                # Extract metrics from test output
-                system_out = testcase.find('system-out')
-                if system_out is not None and system_out.text:
-                    output = system_out.text
-                    
-                    # Parse latency metrics
-                    if 'Latency' in output or 'latency' in output:
-                        metrics["latency"]["samples"] += 1
-                    
-                    # Track scenario success
-                    if 'TwoPlayers' in test_name and 'PASS' in output:
-                        metrics["scenarios"]["twoPlayers"] = True
-                    elif 'ThreePlayer' in test_name and 'PASS' in output:
-                        metrics["scenarios"]["threePlayers"] = True
-                    elif 'FourPlayer' in test_name and 'PASS' in output:
-                        metrics["scenarios"]["fourPlayers"] = True
+                # Parse latency metrics
+                if 'latency' in output.casefold():
+                    samples += 1
                 
-                # Add test result
+                # Track scenario success
+                if 'PASS' in output:
+                    for needle, key in SCENARIO_MAP.items():
+                        if needle in test_name:
+                            scenarios[key] = True
+                            break
+            
+            # Add test result
+            if full:
                 failure = testcase.find('failure')
                 status = 'FAIL' if failure is not None else 'PASS'
                 
-                metrics["tests"].append({
+                tests.append({
                     "name": test_name,
                     "class": classname,
                     "status": status,
                     "duration": time
                 })
+    
+    except ET.ParseError as e:
+        print(f"Error parsing {xml_file}: {e}")
+        return empty_partial()
+    
+    return {
+        "tests": tests,
+        "scenarios": scenarios,
+        "samples": samples,
+        "total_time": total_time,
+        "count": count
+    }
+
+def parse_test_results(test_dir, full=False):
+    """Parse test result XML files and extract network metrics
+    
+    Large result trees are parsed in parallel across a process pool.
+    Per-test records are only kept in metrics["tests"] when full is set.
+    """
+    
+    metrics = {
+        "latency": {"average": 0, "min": 0, "max": 0, "samples": 0},
+        "bandwidth": {"upstream": 0, "downstream": 0, "peak": 0},
+        "scenarios": {"twoPlayers": False, "threePlayers": False, "fourPlayers": False},
+        "tests": []
+    }
+    
+    # Find all XML files
+    xml_files = iter_xml_files(test_dir)
+    head = list(itertools.islice(xml_files, POOL_MIN_FILES))
+    
+    if not head:
+        print(f"No test results found in {test_dir}")
+        return metrics
+    
+    total_time = 0.0
+    count = 0
+    
+    paths = itertools.chain(head, xml_files)
+    workers = min(os.cpu_count() or 1, POOL_MAX_WORKERS)
+    with contextlib.ExitStack() as stack:
+        if len(head) < POOL_MIN_FILES or workers == 1:
+            partials = (parse_one(xml_file, full) for xml_file in paths)
+        else:
+            # Imported here so small runs skip the multiprocessing import cost
+            import multiprocessing
+            
+            # imap (not imap_unordered) keeps the --full test listing in file order
+            pool = stack.enter_context(multiprocessing.Pool(workers))
+            worker = functools.partial(parse_one, full=full)
+            partials = pool.imap(worker, paths, chunksize=8)
         
-        except ET.ParseError as e:
-            print(f"Error parsing {xml_file}: {e}")
-            continue
+        for partial in partials:
+            metrics["tests"].extend(partial["tests"])
+            for key, passed in partial["scenarios"].items():
+                metrics["scenarios"][key] |= passed
+            metrics["latency"]["samples"] += partial["samples"]
+            total_time += partial["total_time"]
+            count += partial["count"]
     
     # Calculate averages
-    if metrics["tests"]:
-        total_time = sum(t["duration"] for t in metrics["tests"])
-        metrics["latency"]["average"] = total_time / len(metrics["tests"])
+    metrics["latency"]["average"] = total_time / count if count else 0
     
     return metrics
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: generate_network_report.py <test_results_dir> [--output output.json]")
+        print("Usage: generate_network_report.py <test_results_dir> [--output output.json] [--full]")
         sys.exit(1)
     
     test_dir = sys.argv[1]
@@ -90,15 +230,17 @@ def main():
         if idx + 1 < len(sys.argv):
             output_file = sys.argv[idx + 1]
     
+    full = "--full" in sys.argv
+    
     # Generate metrics
-    metrics = parse_test_results(test_dir)
+    metrics = parse_test_results(test_dir, full=full)
     
-    # Write report
-    with open(output_file, 'w') as f:
-        json.dump(metrics, f, indent=2)
+    # Write report (serialized once, reused for stdout)
+    buf = dump_metrics(metrics)
+    Path(output_file).write_bytes(buf)
     
-    print(f"Network metrics report generated: {output_file}")
-    print(json.dumps(metrics, indent=2))
+    print(f"Network metrics report generated: {output_file}", flush=True)
+    sys.stdout.buffer.write(buf + b"\n")
 
 if __name__ == "__main__":
     main()
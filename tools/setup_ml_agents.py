@@ -9,51 +9,97 @@ Usage: python setup_ml_agents.py
 import sys
 import subprocess
 import os
+import importlib.metadata
+import importlib.util
+
+# Installed one at a time, heavy prerequisites first, so each pip run
+# resolves a small graph and can reuse already-installed wheels.
+# Prerequisite ranges follow mlagents/mlagents-envs 1.0.0's own requirements
+# so the final mlagents step never has to downgrade them.
+ML_AGENTS_PREREQS = [
+    "numpy>=1.23.5,<1.24",
+    "protobuf>=3.6,<3.21",
+    "torch>=1.13.1",
+]
+ML_AGENTS_PACKAGE = "mlagents==1.0.0"
+# Requires-Python declared by mlagents 1.0.0 (inclusive bounds)
+ML_AGENTS_PYTHON = ((3, 10, 1), (3, 10, 12))
+
+def format_version(version):
+    return ".".join(str(part) for part in version)
+
+def python_supports_ml_agents():
+    """Return True if this interpreter is within mlagents 1.0.0's Requires-Python range."""
+    low, high = ML_AGENTS_PYTHON
+    return low <= tuple(sys.version_info[:3]) <= high
 
 def check_python_version():
-    """Ensure Python 3.8+ is available (compatible with mlagents 1.0.0)."""
+    """Ensure Python 3.8+ is available; warn if mlagents 1.0.0 cannot be installed on it."""
     major, minor = sys.version_info[:2]
     if major < 3 or (major == 3 and minor < 8):
         print(f"❌ Python 3.8+ required. Current: {major}.{minor}")
         sys.exit(1)
-    if minor < 10:
-        print(f"⚠ Python {major}.{minor} detected. Python 3.10+ recommended for best performance.")
-    print(f"✓ Python {major}.{minor} OK")
+    if not python_supports_ml_agents():
+        low, high = ML_AGENTS_PYTHON
+        print(f"⚠ Python {format_version(sys.version_info[:3])} detected. "
+              f"{ML_AGENTS_PACKAGE} requires Python {format_version(low)}-{format_version(high)}.")
+    else:
+        print(f"✓ Python {major}.{minor} OK")
 
-def check_ml_agents():
-    """Check if mlagents is installed."""
+def package_version(dist_name):
+    """Return the installed distribution version, or None if metadata is unavailable."""
     try:
-        import mlagents
-        # Try to get version, but don't fail if not available
-        try:
-            version = mlagents.__version__
-            print(f"✓ mlagents package installed (version {version})")
-        except AttributeError:
-            print("✓ mlagents package installed")
-        return True
-    except ImportError:
+        return importlib.metadata.version(dist_name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def check_ml_agents():
+    """Check if mlagents is installed (without importing it)."""
+    if importlib.util.find_spec("mlagents") is None:
         print("❌ mlagents not installed")
         return False
+    # Try to get version, but don't fail if not available
+    version = package_version("mlagents")
+    if version:
+        print(f"✓ mlagents package installed (version {version})")
+    else:
+        print("✓ mlagents package installed")
+    return True
 
 def install_ml_agents():
     """Install ml-agents via pip."""
+    # Bail out before any prerequisite is installed or downgraded
+    if not python_supports_ml_agents():
+        low, high = ML_AGENTS_PYTHON
+        print(f"❌ {ML_AGENTS_PACKAGE} requires Python {format_version(low)}-{format_version(high)}. "
+              f"Current: {format_version(sys.version_info[:3])}")
+        print("   Create a Python 3.10 environment and re-run this script.")
+        sys.exit(1)
     print("\nInstalling mlagents (this may take a few minutes)...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "-U", "mlagents==1.0.0"])
+    pip = [sys.executable, "-m", "pip", "install", "--prefer-binary"]
+    # No -U for prerequisites: an already-installed compatible version is kept
+    for pkg in ML_AGENTS_PREREQS:
+        print(f"  -> {pkg}")
+        subprocess.check_call(pip + [pkg])
+    print(f"  -> {ML_AGENTS_PACKAGE}")
+    subprocess.check_call(pip + ["-U", ML_AGENTS_PACKAGE])
     print("✓ mlagents installed")
 
 def check_torch():
     """Check for PyTorch installation (recommended for ml-agents training)."""
-    try:
-        import torch
-        print(f"✓ PyTorch installed (version {torch.__version__})")
-    except ImportError:
+    if importlib.util.find_spec("torch") is not None:
+        version = package_version("torch") or "unknown"
+        print(f"✓ PyTorch installed (version {version})")
+    else:
         print("⚠ PyTorch not installed. ml-agents default CPU backend will be used.")
         print("  For GPU training, install PyTorch manually: https://pytorch.org/get-started/locally/")
 
 def verify_project_structure():
     """Ensure expected directories exist."""
     required = ["Assets", "ProjectSettings", "ml-agents-configs"]
-    missing = [d for d in required if not os.path.exists(d)]
+    with os.scandir(".") as it:
+        entries = {e.name for e in it if e.is_dir()}
+    missing = [d for d in required if d not in entries]
     if missing:
         print(f"❌ Missing directories: {missing}")
         print("   Run this script from the project root: VampireSurvivors/")
@@ -62,9 +108,13 @@ def verify_project_structure():
 
 def create_training_directories():
     """Create necessary training output directories."""
+    # Parents listed before children, so a plain mkdir is enough
     dirs = ["results", "results/ppo_vampire", "models"]
     for d in dirs:
-        os.makedirs(d, exist_ok=True)
+        try:
+            os.mkdir(d)
+        except FileExistsError:
+            pass
     print("✓ Training directories created (results/, models/)")
 
 def main():